@@ -1,4 +1,6 @@
 import io
+import uuid
+from functools import partial
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -9,6 +11,13 @@ from plotly.subplots import make_subplots
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+import data_store
+import analytics
+from precompute import Precomputer
+import hierarchy
+import map_layers
+import scenarios
+import hotspots
 
 # Page configuration
 st.set_page_config(
@@ -17,12 +26,141 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Data loading
+# Data loading. Everything downstream is keyed on content fingerprints from the
+# store manifest, so a rewritten file at the same path is never served stale.
 @st.cache_data
-def load_data(path="cleaned_lka_2020_subset_50000.csv"):
-    """Load the cleaned 2020 subset into a DataFrame."""
-    df = pd.read_csv(path)
-    return df
+def list_partitions(version, root=data_store.STORE_DIR):
+    """List the country/year/layer partitions available in the store."""
+    return data_store.list_partitions(root)
+
+@st.cache_data
+def read_manifest(version, root=data_store.STORE_DIR):
+    """Read the store manifest with the content hash of every partition."""
+    return data_store.read_manifest(root)
+
+@st.cache_data(max_entries=64)
+def load_partition(path, partition_hash):
+    """Read one store partition; an updated layer is the only one re-read."""
+    return data_store.read_partition(path)
+
+@st.cache_data(max_entries=8)
+def load_data(data_key, countries, years, _hashes):
+    """Load the selected country/year partitions into a DataFrame."""
+    if not _hashes:
+        return data_store.load_legacy()
+    return data_store.load_partitions(countries, years, read=lambda fp: load_partition(fp, _hashes[fp]))
+
+@st.cache_data(max_entries=8)
+def grid_layout(data_key, _df):
+    """Fingerprint of the loaded row layout, shared by all columns of a dataset."""
+    return data_store.grid_fingerprint(_df)
+
+@st.cache_data(max_entries=8)
+def compare_years(base_key, compare_key, countries, base_year, compare_year, _hashes):
+    """Per-cell year-over-year change between two loaded years."""
+    base_df = load_data(base_key, countries, (base_year,), _hashes)
+    compare_df = load_data(compare_key, countries, (compare_year,), _hashes)
+    return data_store.year_over_year(base_df, compare_df)
+
+# Explorer caches are keyed on the filter state; the frames themselves are not hashed
+@st.cache_resource(max_entries=8)
+def explorer_view(filter_key, _filtered_df):
+    """Filtered rows plus derived ratios, shared read-only across reruns."""
+    return analytics.add_ratios(_filtered_df).reset_index(drop=True)
+
+@st.cache_resource(max_entries=8)
+def explorer_display(filter_key, columns_to_display, _view):
+    """Explorer view with display column names, for exports and custom charts."""
+    return _view.rename(columns=dict(columns_to_display))
+
+@st.cache_resource(max_entries=32)
+def explorer_order(filter_key, sort_col, ascending, _view):
+    """Row order of the explorer view for one sort column and direction."""
+    return analytics.sort_positions(_view[sort_col].to_numpy(), ascending)
+
+@st.cache_data(max_entries=32)
+def explorer_summary(filter_key, columns, _view):
+    """Statistical summary of the explorer view."""
+    return analytics.summarize(_view, list(columns))
+
+@st.cache_resource(max_entries=4)
+def top_orders(data_key):
+    """Descending row order of each pop_* column of one dataset, filled in by fill_top_order."""
+    return {}
+
+def fill_top_order(orders, column, df):
+    """Build one column's descending row order into the per-dataset top_orders holder, once."""
+    if column not in orders:
+        orders[column] = analytics.sort_positions(df[column].to_numpy(), ascending=False)
+
+@st.cache_resource(max_entries=4)
+def top_filters(column_key, _df):
+    """Population and region arrays the top-N filters check."""
+    return analytics.build_top_filters(_df)
+
+@st.cache_resource(max_entries=4)
+def region_totals(data_key, _df):
+    """Per-region sums of every pop_* column, built once per dataset."""
+    return analytics.region_totals(_df, data_store.POP_COLUMNS)
+
+@st.cache_resource(max_entries=4)
+def region_hierarchy(data_key, _df):
+    """Region → district → coarse grid → cell roll-ups, built once per dataset."""
+    return hierarchy.build_hierarchy(_df, data_store.POP_COLUMNS)
+
+@st.cache_resource(max_entries=4)
+def scenario_base(view_key, _df):
+    """Per-cell components the scenario engine projects, built once per view."""
+    return scenarios.base_cells(_df)
+
+@st.cache_resource(max_entries=8)
+def scenario_sweep(view_key, settings, _base):
+    """Scenario draws and their projected totals (scenarios × regions × fields) for one sweep."""
+    n_scenarios, years, growth, ageing, migration, urban_pull = settings
+    draws = scenarios.sample_scenarios(n_scenarios, len(_base["regions"]), growth, ageing, migration, urban_pull)
+    return draws, scenarios.run_sweep(_base, draws, years)
+
+@st.cache_resource(max_entries=8)
+def scenario_map(view_key, settings, index, column, _base, _draws):
+    """Slim map layer data of one scenario's per-cell projection."""
+    return map_layers.layer_frame(scenarios.project_cells(_base, _draws, index, settings[1]), column)
+
+@st.cache_resource(max_entries=4)
+def hotspot_rasters(data_key, resolution, _df):
+    """Per-country rasters of every pop_* column at one resolution, built once per dataset."""
+    return hotspots.rasterize(_df, resolution)
+
+@st.cache_resource(max_entries=16)
+def hotspot_results(data_key, resolution, column, radius, quantile, min_cells, _rasters):
+    """Gi*, local Moran's I and density clusters of one measure on the raster."""
+    return hotspots.analyze(_rasters, column, radius, quantile, min_cells)
+
+@st.cache_data(max_entries=16)
+def hotspot_layer(data_key, resolution, column, radius, quantile, min_cells, layer, _results):
+    """Slim map data of one hotspot layer."""
+    return hotspots.layer_frame(_results, layer)
+
+@st.cache_resource
+def precomputer():
+    """Background pool shared by all sessions for speculative demographic-focus results."""
+    return Precomputer()
+
+@st.cache_data(max_entries=32)
+def map_payload_sizes(filter_key, column, map_type, _filtered_df, _map_frame):
+    """Estimated map payload in bytes before and after slimming the layer data."""
+    return map_layers.payload_sizes(_filtered_df, _map_frame, map_type)
+
+@st.cache_data(max_entries=4)
+def export_csv(filter_key, _display_df):
+    """CSV export of the explorer view."""
+    return _display_df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(max_entries=4)
+def export_excel(filter_key, _display_df):
+    """Excel export of the explorer view."""
+    excel_buffer = io.BytesIO()
+    _display_df.to_excel(excel_buffer, index=False, engine='openpyxl')
+    return excel_buffer.getvalue()
 
 def calculate_key_metrics(df):
     """Calculate key population metrics."""
@@ -42,23 +180,92 @@ def format_number(num):
         return f"{num:,.0f}"
     return num
 
-# Load the data
-df = load_data()
-metrics = calculate_key_metrics(df)
-
-# Divide into simple regions based on coordinates
-df['region'] = 'Central'
-df.loc[df['latitude'] > 8.0, 'region'] = 'Northern'
-df.loc[(df['latitude'] <= 8.0) & (df['latitude'] > 7.5) & (df['longitude'] < 80.5), 'region'] = 'Western'
-df.loc[(df['latitude'] <= 7.5) & (df['longitude'] > 80.5), 'region'] = 'Eastern'
-df.loc[(df['latitude'] <= 7.5) & (df['longitude'] < 80.5), 'region'] = 'Southern'
+def pyramid_figure(pyramid_data, title):
+    """Horizontal male/female bars per age group, with symmetric population ticks."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=pyramid_data['Age Group'],
+        x=pyramid_data['Male'],
+        name='Male',
+        orientation='h',
+        marker=dict(color='#007BFF'),
+        hovertemplate='Male: %{customdata:,.0f}<extra></extra>',
+        customdata=-pyramid_data['Male']
+    ))
+    fig.add_trace(go.Bar(
+        y=pyramid_data['Age Group'],
+        x=pyramid_data['Female'],
+        name='Female',
+        orientation='h',
+        marker=dict(color='#FF69B4'),
+        hovertemplate='Female: %{x:,.0f}<extra></extra>'
+    ))
+    extent = max(float(pyramid_data['Female'].max()), float(-pyramid_data['Male'].min()), 1.0)
+    ticks = np.linspace(-extent, extent, 5)
+    fig.update_layout(
+        title=title,
+        barmode='relative',
+        bargap=0.1,
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0),
+        xaxis=dict(
+            title='Population',
+            tickvals=ticks,
+            ticktext=[format_number(abs(tick)) for tick in ticks],
+        ),
+        yaxis=dict(title=''),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
 
-# Sidebar for global filters
+# Dataset selection: only the chosen partitions are read from the store
+store_version = data_store.store_version()
+partitions = data_store.with_hashes(list_partitions(store_version), read_manifest(store_version))
+partition_hashes = dict(zip(partitions["path"], partitions["hash"]))
+if partitions.empty:
+    partitions = pd.DataFrame({"country": ["lka"], "year": [2020]})
 with st.sidebar:
     st.title("Population Dashboard")
     
     st.markdown("---")
     
+    st.subheader("Dataset")
+    countries = sorted(partitions["country"].unique())
+    selected_countries = st.multiselect("Countries", countries, default=countries[:1]) or countries[:1]
+    years = sorted(partitions.loc[partitions["country"].isin(selected_countries), "year"].unique())
+    selected_year = st.selectbox("Year", years, index=len(years) - 1)
+    compare_options = ["None"] + [year for year in years if year != selected_year]
+    compare_year = st.selectbox("Compare With", compare_options)
+
+# Load the data
+selection = partitions[partitions["country"].isin(selected_countries) & (partitions["year"] == selected_year)]
+missing_countries = sorted(set(selected_countries) - set(selection["country"]))
+if missing_countries:
+    st.sidebar.warning(f"No {selected_year} data for: {', '.join(missing_countries)}")
+for (country, year), columns in data_store.missing_layers(selection).items():
+    st.sidebar.warning(f"{country} {year} has no {', '.join(columns)} layer; shown as 0")
+data_key = data_store.fingerprint(selection) if partition_hashes else data_store.legacy_fingerprint()
+df = load_data(data_key, tuple(selected_countries), (selected_year,), partition_hashes)
+# Per-column keys: results that read one column survive updates to the other layers
+layout_key = grid_layout(data_key, df)
+column_keys = {
+    col: (layout_key, data_store.fingerprint(selection, [col]) if partition_hashes else data_key)
+    for col in data_store.POP_COLUMNS
+}
+metrics = calculate_key_metrics(df)
+
+# Divide into simple regions based on coordinates. The bands are drawn for Sri Lanka;
+# cells of any other country form a single region named after the country.
+is_lka = df['country'] == 'lka'
+df['region'] = df['country'].str.upper()
+df.loc[is_lka, 'region'] = 'Central'
+df.loc[is_lka & (df['latitude'] > 8.0), 'region'] = 'Northern'
+df.loc[is_lka & (df['latitude'] <= 8.0) & (df['latitude'] > 7.5) & (df['longitude'] < 80.5), 'region'] = 'Western'
+df.loc[is_lka & (df['latitude'] <= 7.5) & (df['longitude'] > 80.5), 'region'] = 'Eastern'
+df.loc[is_lka & (df['latitude'] <= 7.5) & (df['longitude'] < 80.5), 'region'] = 'Southern'
+
+# Sidebar for global filters
+with st.sidebar:
     # Population threshold filter
     st.subheader("Filters")
     with st.expander("Population Filters", expanded=True):
@@ -97,6 +304,7 @@ with st.sidebar:
         regions = sorted(df['region'].unique())
         selected_regions = st.multiselect("Regions", regions, default=regions)
         filtered_df = filtered_df[filtered_df['region'].isin(selected_regions)]
+    filter_key = (data_key, pop_threshold, tuple(selected_regions))
     
     st.markdown("### Filtered Data Summary")
     st.info(f"Showing {len(filtered_df):,} out of {len(df):,} divisions")
@@ -104,12 +312,37 @@ with st.sidebar:
     st.progress(percentage / 100)
     st.caption(f"{percentage:.1f}% of total data")
     st.markdown("---")
-    st.caption("Data source: Census 2020")
+    st.caption(f"Data source: Census {selected_year}")
     filtered_metrics = calculate_key_metrics(filtered_df)
     st.markdown(f"**Total Population:** {format_number(filtered_metrics['Overall'])}")
     percentage_of_total = filtered_metrics['Overall'] / metrics['Overall'] * 100
     st.caption(f"{percentage_of_total:.1f}% of total population")
 
+# Precompute every demographic focus for the current filters in the background,
+# so switching "Demographic Focus" is a cache hit. A new filter state cancels queued work.
+if "session_token" not in st.session_state:
+    st.session_state.session_token = uuid.uuid4().hex
+focus_pool = precomputer()
+# A column's results depend on that column, the threshold column and the filters
+focus_keys = {
+    col: (column_keys[col], column_keys['pop_overall'], pop_threshold, tuple(selected_regions))
+    for col in data_store.POP_COLUMNS
+}
+# The batch holds a map frame per column; budget for two batches so it never evicts itself
+focus_pool.reserve(2 * len(data_store.POP_COLUMNS) * map_layers.frame_bytes(len(filtered_df)))
+# Sort orders live in their own per-dataset cache; the pool only schedules building them
+orders = top_orders(data_key)
+focus = focus_pool.get_or_compute(("focus", focus_keys[selected_col]), analytics.focus_summary, filtered_df, selected_col)
+focus_pool.schedule(st.session_state.session_token, [
+    task
+    for col in data_store.POP_COLUMNS
+    for task in (
+        (("focus", focus_keys[col]), analytics.focus_summary, filtered_df, col),
+        (("map", focus_keys[col]), map_layers.layer_frame, filtered_df, col),
+        (("top", data_key, col), fill_top_order, orders, col, df),
+    )
+])
+
 # Main dashboard content
 st.title("Population Analytics Dashboard")
 st.caption("Explore detailed demographic data across geographic divisions")
@@ -203,12 +436,10 @@ with tab1:
     with col1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Regional Population Distribution")
-        region_stats = df.groupby('region').agg(
-            total_population=('pop_overall', 'sum'),
-            male_population=('pop_men', 'sum'),
-            female_population=('pop_women', 'sum'),
-            division_count=('pop_overall', 'count')
-        ).reset_index()
+        region_levels = region_hierarchy(data_key, df)
+        region_stats = hierarchy.children(region_levels, []).rename(
+            columns={'label': 'region', 'value': 'total_population', 'cells': 'division_count'}
+        )
         region_stats['percentage'] = region_stats['total_population'] / region_stats['total_population'].sum() * 100
         region_stats = region_stats.sort_values('total_population', ascending=False)
         region_fig = px.bar(
@@ -232,7 +463,8 @@ with tab1:
             textposition='auto',
             hovertemplate='<b>%{x}</b><br>Population: %{y:,.0f}<br>Percentage: %{text}<extra></extra>'
         )
-        st.plotly_chart(region_fig, use_container_width=True)
+        region_event = st.plotly_chart(region_fig, use_container_width=True, on_select="rerun", selection_mode="points", key="drill_region")
+        st.caption("Click a region to drill down")
         st.markdown('</div>', unsafe_allow_html=True)
     with col2:
         st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -266,14 +498,82 @@ with tab1:
         )
         st.plotly_chart(demo_fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
+    region_points = region_event.selection.points if region_event else []
+    if region_points:
+        # Each chart selection drills one level further; clearing it rolls back up
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("Regional Drill-Down")
+        drill_measures = {
+            'pop_overall': 'Total Population',
+            'pop_men': 'Male Population',
+            'pop_women': 'Female Population',
+            'pop_0_5': 'Children (0-5)',
+            'pop_15_24': 'Youth (15-24)',
+            'pop_60_plus': 'Elderly (60+)',
+            'pop_women_15_49': 'Women (15-49)',
+            'gender_ratio': 'Gender Ratio',
+            'dependency_ratio': 'Dependency Ratio',
+            'child_woman_ratio': 'Child-Woman Ratio'
+        }
+        drill_col = st.selectbox(
+            "Measure",
+            options=list(drill_measures),
+            index=list(drill_measures).index(selected_col),
+            format_func=drill_measures.get
+        )
+        drill_path = [region_points[0]['x']]
+        level_names = {'district': 'District', 'coarse': 'Grid Block', 'cell': 'Cell'}
+        while True:
+            level = hierarchy.LEVELS[len(drill_path)]
+            node = hierarchy.roll_up(region_levels, drill_path, drill_col)
+            st.markdown(f"**{' › '.join(drill_path)}** — {drill_measures[drill_col]}: {node['value']:,.1f} across {int(node['cells']):,} cells")
+            drill_rows = hierarchy.children(region_levels, drill_path, drill_col)
+            if level == 'cell':
+                st.dataframe(
+                    drill_rows.sort_values('value', ascending=False)[['label', 'value', 'latitude', 'longitude']],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={'label': 'Cell', 'value': st.column_config.NumberColumn(drill_measures[drill_col], format="%.1f")}
+                )
+                break
+            drill_fig = px.bar(
+                drill_rows.sort_values('value', ascending=False),
+                x='label',
+                y='value',
+                labels={'label': level_names[level], 'value': drill_measures[drill_col]},
+                title=f"{level_names[level]}s in {drill_path[-1]}"
+            )
+            drill_fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20))
+            drill_event = st.plotly_chart(drill_fig, use_container_width=True, on_select="rerun", selection_mode="points", key="drill_" + "|".join(drill_path))
+            drill_points = drill_event.selection.points if drill_event else []
+            if not drill_points:
+                st.caption(f"Click a {level_names[level].lower()} to drill down further")
+                break
+            drill_path.append(drill_points[0]['x'])
+        st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Top Population Centers")
-    top_divisions = df.nlargest(10, selected_col).copy()
-    pop_columns = [col for col in top_divisions.columns if col.startswith('pop_')]
-    for col in pop_columns:
-        top_divisions[col] = top_divisions[col].apply(format_number)
-    top_divisions = top_divisions[['latitude', 'longitude', 'pop_overall', 'pop_men', 'pop_women', 'region']]
-    top_divisions.columns = ['Latitude', 'Longitude', 'Total Population', 'Male', 'Female', 'Region']
+    top_n = st.select_slider("Number of Centers", options=[5, 10, 25, 50, 100], value=10)
+    # Wait for the background build of this column's order if it is queued, else build it here
+    focus_pool.get_or_compute(("top", data_key, selected_col), fill_top_order, orders, selected_col, df)
+    fill_top_order(orders, selected_col, df)
+    top_rows = analytics.top_positions(
+        orders[selected_col],
+        top_filters(column_keys['pop_overall'], df),
+        top_n,
+        pop_threshold,
+        selected_regions
+    )
+    top_columns = {'latitude': 'Latitude', 'longitude': 'Longitude'}
+    if selected_col not in ('pop_overall', 'pop_men', 'pop_women'):
+        top_columns[selected_col] = selected_demo
+    top_columns.update({'pop_overall': 'Total Population', 'pop_men': 'Male', 'pop_women': 'Female', 'region': 'Region'})
+    top_divisions = df.iloc[top_rows][list(top_columns)]
+    # Only the returned rows are formatted
+    for col in top_divisions.columns:
+        if col.startswith('pop_'):
+            top_divisions[col] = top_divisions[col].map(format_number)
+    top_divisions = top_divisions.rename(columns=top_columns)
     st.dataframe(
         top_divisions,
         use_container_width=True,
@@ -284,8 +584,43 @@ with tab1:
             "Female": st.column_config.NumberColumn(format="%d"),
         }
     )
-    st.caption("Top 10 divisions by selected demographic: " + selected_demo)
+    st.caption(f"Top {top_n} divisions matching the current filters by selected demographic: " + selected_demo)
     st.markdown('</div>', unsafe_allow_html=True)
+    if compare_year != "None":
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader(f"Year-over-Year Change ({selected_year} → {compare_year})")
+        compare_selection = partitions[partitions["country"].isin(selected_countries) & (partitions["year"] == compare_year)]
+        compare_key = data_store.fingerprint(compare_selection)
+        yoy = compare_years(data_key, compare_key, tuple(selected_countries), selected_year, compare_year, partition_hashes)
+        yoy_summary = pd.DataFrame({
+            'Group': list(metrics.keys()),
+            str(selected_year): [yoy[f'{col}_base'].sum() for col in data_store.POP_COLUMNS],
+            str(compare_year): [yoy[f'{col}_compare'].sum() for col in data_store.POP_COLUMNS],
+        })
+        yoy_summary['Change'] = yoy_summary[str(compare_year)] - yoy_summary[str(selected_year)]
+        yoy_summary['Change (%)'] = yoy_summary['Change'] / yoy_summary[str(selected_year)] * 100
+        st.dataframe(
+            yoy_summary,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                str(selected_year): st.column_config.NumberColumn(format="%d"),
+                str(compare_year): st.column_config.NumberColumn(format="%d"),
+                "Change": st.column_config.NumberColumn(format="%d"),
+                "Change (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            }
+        )
+        yoy_fig = px.histogram(
+            yoy,
+            x=f'{selected_col}_pct_change',
+            nbins=50,
+            title=f'Per-cell Change in {selected_demo} (%)',
+            opacity=0.7
+        )
+        yoy_fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20), xaxis_title="Change (%)", yaxis_title="Number of Divisions")
+        st.plotly_chart(yoy_fig, use_container_width=True)
+        st.caption(f"Compared on {len(yoy):,} grid cells present in both years")
+        st.markdown('</div>', unsafe_allow_html=True)
 
 # --------- TAB 2: DEMOGRAPHICS ---------
 with tab2:
@@ -294,54 +629,11 @@ with tab2:
     with col1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Population Pyramid")
-        pyramid_data = pd.DataFrame({
-            'Age Group': ['0-5', '15-24', '25-59', '60+'],
-            'Male': [
-                -df['pop_men'].sum() * 0.1,
-                -df['pop_men'].sum() * 0.2,
-                -df['pop_men'].sum() * 0.6,
-                -df['pop_men'].sum() * 0.1
-            ],
-            'Female': [
-                df['pop_women'].sum() * 0.1,
-                df['pop_women'].sum() * 0.2,
-                df['pop_women'].sum() * 0.55,
-                df['pop_women'].sum() * 0.15
-            ]
-        })
-        pyramid_fig = go.Figure()
-        pyramid_fig.add_trace(go.Bar(
-            y=pyramid_data['Age Group'],
-            x=pyramid_data['Male'],
-            name='Male',
-            orientation='h',
-            marker=dict(color='#007BFF'),
-            hovertemplate='Male: %{x:,.0f}<extra></extra>'
-        ))
-        pyramid_fig.add_trace(go.Bar(
-            y=pyramid_data['Age Group'],
-            x=pyramid_data['Female'],
-            name='Female',
-            orientation='h',
-            marker=dict(color='#FF69B4'),
-            hovertemplate='Female: %{x:,.0f}<extra></extra>'
-        ))
-        pyramid_fig.update_layout(
-            title='Population Pyramid (Age & Gender Distribution)',
-            barmode='relative',
-            bargap=0.1,
-            height=400,
-            margin=dict(l=0, r=0, t=30, b=0),
-            xaxis=dict(
-                title='Population',
-                tickvals=[-10000000, -7500000, -5000000, -2500000, 0, 2500000, 5000000, 7500000, 10000000],
-                ticktext=['10M', '7.5M', '5M', '2.5M', '0', '2.5M', '5M', '7.5M', '10M'],
-            ),
-            yaxis=dict(title=''),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        # Age groups come from the published layers; each cell's sex ratio splits them
+        pyramid_data = scenarios.pyramid(scenario_base((data_key,), df)["values"].sum(axis=0))
+        pyramid_fig = pyramid_figure(pyramid_data, 'Population Pyramid (Age & Gender Distribution)')
         st.plotly_chart(pyramid_fig, use_container_width=True)
-        st.caption("Note: This pyramid is an approximation based on available age groups")
+        st.caption("Ages 6-14 and 25-59 are not published separately and are shown as one group")
         st.markdown('</div>', unsafe_allow_html=True)
     with col2:
         st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -454,33 +746,145 @@ with tab2:
     }
     selected_demo_key = selected_col
     selected_demo_name = demographic_options[selected_demo_key]
-    hist_fig = px.histogram(
-        filtered_df,
-        x=selected_demo_key,
-        nbins=50,
-        title=f'Distribution of {selected_demo_name}',
-        labels={selected_demo_key: selected_demo_name},
+    # Built from the precomputed bins and quartiles rather than the raw rows
+    hist_fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    hist_fig.add_trace(go.Box(
+        q1=[focus['q1']],
+        median=[focus['median']],
+        q3=[focus['q3']],
+        lowerfence=[focus['lowerfence']],
+        upperfence=[focus['upperfence']],
+        mean=[focus['mean']],
+        y=[selected_demo_name],
+        orientation='h',
+        name=selected_demo_name,
+        showlegend=False
+    ), row=1, col=1)
+    hist_fig.add_trace(go.Bar(
+        x=(focus['edges'][:-1] + focus['edges'][1:]) / 2,
+        y=focus['counts'],
+        width=np.diff(focus['edges']),
         opacity=0.7,
-        marginal='box'
-    )
+        name=selected_demo_name,
+        showlegend=False,
+        hovertemplate=f'{selected_demo_name}: %{{x:,.0f}}<br>Divisions: %{{y:,}}<extra></extra>'
+    ), row=2, col=1)
+    hist_fig.update_yaxes(showticklabels=False, row=1, col=1)
     hist_fig.update_layout(
+        title=f'Distribution of {selected_demo_name}',
         height=400,
         margin=dict(l=20, r=20, t=40, b=20),
-        xaxis_title=selected_demo_name,
-        yaxis_title="Number of Divisions",
+        bargap=0,
     )
+    hist_fig.update_xaxes(title_text=selected_demo_name, row=2, col=1)
+    hist_fig.update_yaxes(title_text="Number of Divisions", row=2, col=1)
     st.plotly_chart(hist_fig, use_container_width=True)
     stats_col1, stats_col2, stats_col3, stats_col4, stats_col5 = st.columns(5)
     with stats_col1:
-        st.metric("Minimum", format_number(filtered_df[selected_demo_key].min()))
+        st.metric("Minimum", format_number(float(focus['min'])))
     with stats_col2:
-        st.metric("Maximum", format_number(filtered_df[selected_demo_key].max()))
+        st.metric("Maximum", format_number(float(focus['max'])))
     with stats_col3:
-        st.metric("Mean", format_number(int(filtered_df[selected_demo_key].mean())))
+        st.metric("Mean", format_number(float(focus['mean'])))
     with stats_col4:
-        st.metric("Median", format_number(int(filtered_df[selected_demo_key].median())))
+        st.metric("Median", format_number(float(focus['median'])))
     with stats_col5:
-        st.metric("Total", format_number(filtered_df[selected_demo_key].sum()))
+        st.metric("Total", format_number(float(focus['sum'])))
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("Scenario Projections")
+    scenario_cols = st.columns(3)
+    with scenario_cols[0]:
+        horizon = st.slider("Horizon (years)", 1, 30, 10)
+        n_scenarios = st.select_slider("Scenarios", options=[10, 50, 100, 200, 500, 1000], value=200)
+    with scenario_cols[1]:
+        growth_range = st.slider("Annual Growth (%)", -3.0, 3.0, (-0.5, 1.0), 0.1)
+        ageing_range = st.slider("Annual Ageing Shift (%)", 0.0, 3.0, (0.5, 1.5), 0.1)
+    with scenario_cols[2]:
+        migration_range = st.slider("Regional Net Migration (%)", -2.0, 2.0, (-0.5, 0.5), 0.1)
+        pull_range = st.slider("Urban Pull (%)", 0.0, 2.0, (0.0, 0.0), 0.1)
+    st.caption(
+        "Each scenario draws national growth and ageing rates and a net migration rate per region from the ranges above. "
+        "Ageing moves growth from the under-25 groups to the 60+ group; urban pull adds migration to denser cells."
+    )
+    # Rates are stored as fractions; the whole sweep is one batched projection, cached per view
+    scenario_settings = (n_scenarios, horizon) + tuple(
+        (low / 100, high / 100) for low, high in (growth_range, ageing_range, migration_range, pull_range)
+    )
+    projection_base = scenario_base(filter_key, filtered_df)
+    scenario_draws, scenario_totals = scenario_sweep(filter_key, scenario_settings, projection_base)
+    projected = scenarios.scenario_metrics(scenario_totals, scenario_draws)
+    current = scenarios.projected_metrics(projection_base["values"].sum(axis=0)).iloc[0]
+
+    metric_names = dict(demographic_options, dependency_ratio='Dependency Ratio (%)')
+    percentiles = projected[list(metric_names)].quantile([0.05, 0.5, 0.95])
+    projection_table = pd.DataFrame({
+        'Metric': list(metric_names.values()),
+        'Current': current[list(metric_names)].to_numpy(),
+        '5th Percentile': percentiles.loc[0.05].to_numpy(),
+        'Median': percentiles.loc[0.5].to_numpy(),
+        '95th Percentile': percentiles.loc[0.95].to_numpy(),
+    })
+    projection_table['Median Change (%)'] = (projection_table['Median'] / projection_table['Current'] - 1) * 100
+    st.dataframe(
+        projection_table.style.format({col: "{:,.2f}" for col in projection_table.columns if col != 'Metric'}),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    outcome_fig = px.histogram(
+        projected,
+        x='pop_overall',
+        nbins=40,
+        title=f'Projected Total Population in {horizon} Years ({n_scenarios} Scenarios)',
+        labels={'pop_overall': 'Projected Total Population'},
+        color_discrete_sequence=['#4e8df5']
+    )
+    outcome_fig.add_vline(x=current['pop_overall'], line_dash='dash', line_color='#555', annotation_text='Current')
+    outcome_fig.update_layout(height=350, margin=dict(l=20, r=20, t=40, b=20), yaxis_title="Scenarios", bargap=0.05)
+    st.plotly_chart(outcome_fig, use_container_width=True)
+
+    outcome = st.radio(
+        "Projected Scenario",
+        options=["Low (5th percentile)", "Median", "High (95th percentile)"],
+        index=1,
+        horizontal=True
+    )
+    outcome_quantile = {"Low (5th percentile)": 0.05, "Median": 0.5, "High (95th percentile)": 0.95}[outcome]
+    scenario_index = int(np.argmin(np.abs(projected['pop_overall'] - projected['pop_overall'].quantile(outcome_quantile))))
+    st.caption(
+        f"Scenario {scenario_index + 1}: growth {scenario_draws['growth'][scenario_index] * 100:.2f}%/yr, "
+        f"ageing shift {scenario_draws['ageing'][scenario_index] * 100:.2f}%/yr, "
+        f"urban pull {scenario_draws['urban_pull'][scenario_index] * 100:.2f}%/yr, migration "
+        + ", ".join(f"{name} {rate * 100:+.2f}%" for name, rate in zip(projection_base["regions"], scenario_draws['migration'][scenario_index]))
+    )
+    proj_col1, proj_col2 = st.columns(2)
+    with proj_col1:
+        projected_pyramid = scenarios.pyramid(scenario_totals[scenario_index].sum(axis=0))
+        st.plotly_chart(pyramid_figure(projected_pyramid, f'Projected Population Pyramid ({outcome})'), use_container_width=True)
+    with proj_col2:
+        projected_map = scenario_map(filter_key, scenario_settings, scenario_index, selected_col, projection_base, scenario_draws)
+        projected_layer = pdk.Layer(
+            "HeatmapLayer",
+            data=map_layers.layer_data(projected_map, "Heat Map"),
+            opacity=0.8,
+            get_position=["lon", "lat"],
+            get_weight="v",
+            threshold=0.1,
+            aggregation="SUM",
+            pickable=True
+        )
+        st.pydeck_chart(pdk.Deck(
+            layers=[projected_layer],
+            initial_view_state=pdk.ViewState(
+                latitude=filtered_df["latitude"].mean(),
+                longitude=filtered_df["longitude"].mean(),
+                zoom=6,
+                pitch=0,
+            ),
+            height=400
+        ), use_container_width=True)
+        st.caption(f"Projected {selected_demo_name} in {horizon} years ({outcome})")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # --------- TAB 3: SPATIAL ANALYSIS ---------
@@ -494,13 +898,16 @@ with tab3:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     demo_col = selected_col
     demo_name = selected_demo
+    # Slim per-point layer data with precomputed accessors, shared with the background pool
+    map_frame = focus_pool.get_or_compute(("map", focus_keys[demo_col]), map_layers.layer_frame, filtered_df, demo_col)
+    map_data = map_layers.layer_data(map_frame, map_type)
     if map_type == "Heat Map":
         heat_layer = pdk.Layer(
             "HeatmapLayer",
-            data=filtered_df,
+            data=map_data,
             opacity=0.8,
-            get_position=["longitude", "latitude"],
-            get_weight=demo_col,
+            get_position=["lon", "lat"],
+            get_weight="v",
             threshold=0.1,
             aggregation="SUM",
             pickable=True
@@ -514,7 +921,7 @@ with tab3:
         heat_map = pdk.Deck(
             layers=[heat_layer],
             initial_view_state=view_state,
-            tooltip={"text": f"{demo_name}: {{{demo_col}}}"},
+            tooltip={"text": f"{demo_name}: {{v}}"},
             height=map_height
         )
         st.subheader(f"Heat Map of {demo_name}")
@@ -522,9 +929,9 @@ with tab3:
     elif map_type == "Scatter Plot":
         scatter_layer = pdk.Layer(
             "ScatterplotLayer",
-            data=filtered_df,
-            get_position=["longitude", "latitude"],
-            get_radius=f"{demo_col} / 20",
+            data=map_data,
+            get_position=["lon", "lat"],
+            get_radius="r",
             pickable=True,
             opacity=0.8,
             stroked=True,
@@ -543,7 +950,7 @@ with tab3:
         scatter_map = pdk.Deck(
             layers=[scatter_layer],
             initial_view_state=view_state,
-            tooltip={...},
+            tooltip={"text": f"{demo_name}: {{v}}"},
             height=map_height
         )
         st.subheader(f"Population Density of {demo_name}")
@@ -551,9 +958,10 @@ with tab3:
     else:  # 3D Elevation
         elevation_layer = pdk.Layer(
             "HexagonLayer",
-            data=filtered_df,
-            get_position=["longitude", "latitude"],
-            get_elevation=f"{demo_col} / 50",
+            data=map_data,
+            get_position=["lon", "lat"],
+            get_elevation_weight="e",
+            elevation_aggregation="SUM",
             elevation_scale=50,
             pickable=True,
             elevation_range=[0, 3000],
@@ -574,17 +982,25 @@ with tab3:
         )
         st.subheader(f"3D Elevation Map of {demo_name}")
         st.pydeck_chart(elevation_map, use_container_width=True)
+    payload_before, payload_after = map_payload_sizes(filter_key, demo_col, map_type, filtered_df, map_frame)
+    if payload_before:
+        st.caption(
+            f"Map payload: ≈{payload_after / 1024 ** 2:,.1f} MB for {len(map_data):,} points "
+            f"(≈{payload_before / 1024 ** 2:,.1f} MB with all columns, {payload_after / payload_before:.0%} of the original)"
+        )
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Regional Population Analysis")
     col1, col2 = st.columns(2)
     with col1:
-        region_data = df.groupby('region').agg(
-            latitude=('latitude', 'mean'),
-            longitude=('longitude', 'mean'),
-            population=('pop_overall', 'sum'),
-            population_selected=(selected_col, 'sum')
-        ).reset_index()
+        totals = region_totals(data_key, df)
+        region_data = pd.DataFrame({
+            'region': totals['region'],
+            'latitude': totals['latitude'],
+            'longitude': totals['longitude'],
+            'population': totals['pop_overall'],
+            'population_selected': totals[selected_col]
+        })
         region_map = px.scatter_mapbox(
             region_data,
             lat="latitude",
@@ -790,16 +1206,98 @@ with tab4:
     - Diagonal alignment of points suggests strong correlation between the variables
     """)
     st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("Spatial Hotspots & Clusters")
+    hotspot_measures = dict(
+        demographic_options,
+        gender_ratio='Gender Ratio',
+        dependency_ratio='Dependency Ratio',
+        child_woman_ratio='Child-Woman Ratio'
+    )
+    hotspot_options = st.columns(4)
+    with hotspot_options[0]:
+        hotspot_col = st.selectbox(
+            "Hotspot Measure",
+            options=list(hotspot_measures),
+            index=list(hotspot_measures).index(selected_col),
+            format_func=hotspot_measures.get
+        )
+    with hotspot_options[1]:
+        hotspot_resolution = st.select_slider("Grid Resolution (degrees)", options=hotspots.RESOLUTIONS, value=0.01)
+    with hotspot_options[2]:
+        hotspot_radius = st.slider("Neighborhood Radius (grid cells)", 1, 5, 1)
+    with hotspot_options[3]:
+        hotspot_view = st.radio("Hotspot Layer", options=["Getis-Ord Gi*", "Local Moran's I", "Density Clusters"])
+    cluster_options = st.columns(2)
+    with cluster_options[0]:
+        cluster_percentile = st.slider("High-Value Percentile", 50, 99, 90)
+    with cluster_options[1]:
+        cluster_min_cells = st.slider("Minimum Core Neighbors", 2, 25, 4)
+    # Rasterized once per dataset and resolution; the statistics are window sums over the raster
+    hotspot_key = (data_key, hotspot_resolution, hotspot_col, hotspot_radius, cluster_percentile / 100, cluster_min_cells)
+    rasters = hotspot_rasters(data_key, hotspot_resolution, df)
+    hotspot_stats = hotspot_results(*hotspot_key, rasters)
+    hotspot_data = hotspot_layer(*hotspot_key, hotspot_view, hotspot_stats)
+
+    hs_col1, hs_col2, hs_col3, hs_col4 = st.columns(4)
+    with hs_col1:
+        st.metric("Hot Spots", format_number(int(hotspot_stats['gi_class'].str.startswith('Hot').sum())))
+    with hs_col2:
+        st.metric("Cold Spots", format_number(int(hotspot_stats['gi_class'].str.startswith('Cold').sum())))
+    with hs_col3:
+        moran_i = hotspots.global_moran_i(hotspot_stats)
+        st.metric("Global Moran's I", f"{moran_i:.3f}" if np.isfinite(moran_i) else "-")
+    with hs_col4:
+        st.metric("Density Clusters", format_number(int(hotspot_stats['cluster'].max() + 1) if len(hotspot_stats) else 0))
+
+    hotspot_deck = pdk.Deck(
+        layers=[pdk.Layer(
+            "ScatterplotLayer",
+            data=hotspot_data,
+            get_position=["lon", "lat"],
+            get_fill_color="c",
+            get_radius=hotspot_resolution * hotspots.METERS_PER_DEGREE / 2,
+            opacity=0.7,
+            pickable=True
+        )],
+        initial_view_state=pdk.ViewState(
+            latitude=df["latitude"].mean(),
+            longitude=df["longitude"].mean(),
+            zoom=6.5,
+            pitch=0,
+        ),
+        tooltip={"text": f"{{k}}\n{hotspot_measures[hotspot_col]}: {{v}}\nStatistic: {{s}}"},
+        height=550
+    )
+    st.pydeck_chart(hotspot_deck, use_container_width=True)
+    st.caption(
+        f"{len(hotspot_stats):,} occupied {hotspot_resolution}° grid cells, {len(hotspot_data):,} shown. "
+        "Ratios are recomputed from the summed populations of each grid cell."
+    )
+    if hotspot_view == "Density Clusters":
+        st.dataframe(
+            hotspots.cluster_summary(hotspot_stats).head(20).style.format({
+                'population': "{:,.0f}", 'mean_value': "{:,.2f}", 'longitude': "{:.3f}", 'latitude': "{:.3f}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+    st.markdown("""
+    Population cells are summed onto a regular grid and compared with the grid cells around them.
+    
+    **Layers:**
+    - **Getis-Ord Gi\\***: hot spots are groups of high values surrounded by high values; cold spots the reverse (95% / 99% confidence)
+    - **Local Moran's I**: High-High and Low-Low cells sit in clusters of similar values; High-Low and Low-High cells are spatial outliers
+    - **Density Clusters**: connected groups of cells above the chosen percentile, where each core cell has at least the minimum number of high-value neighbors in its window
+    """)
+    st.markdown('</div>', unsafe_allow_html=True)
 
 # --------- TAB 5: DATA EXPLORER ---------
 with tab5:
     st.header("Data Explorer")
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Interactive Data Table")
-    display_df = filtered_df.copy()
-    display_df['gender_ratio'] = display_df['pop_men'] / display_df['pop_women'] * 100
-    display_df['dependency_ratio'] = (display_df['pop_0_5'] + display_df['pop_60_plus']) / (display_df['pop_overall'] - display_df['pop_0_5'] - display_df['pop_60_plus']) * 100
-    display_df['child_woman_ratio'] = (display_df['pop_0_5'] / display_df['pop_women_15_49']) * 1000
+    view = explorer_view(filter_key, filtered_df)
     columns_to_display = {
         'region': 'Region',
         'latitude': 'Latitude',
@@ -815,7 +1313,8 @@ with tab5:
         'dependency_ratio': 'Dependency Ratio',
         'child_woman_ratio': 'Child-Woman Ratio'
     }
-    display_df = display_df.rename(columns=columns_to_display)
+    rev_columns = {v: k for k, v in columns_to_display.items()}
+    display_df = explorer_display(filter_key, tuple(columns_to_display.items()), view)
     with st.expander("Select Columns to Display", expanded=False):
         selected_columns = st.multiselect(
             "Columns",
@@ -824,25 +1323,44 @@ with tab5:
         )
     if not selected_columns:
         selected_columns = ['Region', 'Total Population', 'Male Population', 'Female Population', 'Gender Ratio']
-    st.dataframe(display_df[selected_columns], use_container_width=True, height=500, hide_index=True)
-    st.caption(f"Showing {len(display_df)} records based on current filters")
+    table_mode = st.radio("Table Mode", options=["Paginated", "Full Table"], horizontal=True)
+    if table_mode == "Paginated":
+        # Sorting and paging run on the cached view; only the visible page is sent to the browser
+        table_options = st.columns(4)
+        with table_options[0]:
+            sort_by = st.selectbox("Sort By", options=list(columns_to_display.values()), index=list(columns_to_display.values()).index('Total Population'))
+        with table_options[1]:
+            sort_order = st.selectbox("Order", options=["Descending", "Ascending"])
+        with table_options[2]:
+            page_size = st.selectbox("Rows per Page", options=[25, 50, 100, 250, 500], index=2)
+        n_pages = analytics.page_count(len(view), page_size)
+        with table_options[3]:
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        order = explorer_order(filter_key, rev_columns[sort_by], sort_order == "Ascending", view)
+        page_df = analytics.page_rows(view, order, [rev_columns[c] for c in selected_columns], int(page), page_size)
+        st.dataframe(page_df.rename(columns=columns_to_display), use_container_width=True, height=500, hide_index=True)
+        first_row = (int(page) - 1) * page_size + 1 if len(view) else 0
+        last_row = min(int(page) * page_size, len(view))
+        st.caption(f"Showing records {first_row:,}–{last_row:,} of {len(view):,} (page {int(page)} of {n_pages})")
+    else:
+        st.dataframe(display_df[selected_columns], use_container_width=True, height=500, hide_index=True)
+        st.caption(f"Showing {len(display_df)} records based on current filters")
     col1, col2 = st.columns(2)
     with col1:
-        csv = display_df.to_csv(index=False).encode('utf-8')
-        st.download_button(label="Download as CSV", data=csv, file_name="population_data.csv", mime="text/csv")
+        # Files are built only when a download is clicked, never during the rerun
+        st.download_button(label="Download as CSV", data=partial(export_csv, filter_key, display_df), file_name="population_data.csv", mime="text/csv")
     with col2:
-        excel_buffer = io.BytesIO()
-        display_df.to_excel(excel_buffer, index=False, engine='openpyxl')
-        excel_data = excel_buffer.getvalue()
-        st.download_button(label="Download as Excel", data=excel_data, file_name="population_data.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        if len(display_df) < 1048576:
+            st.download_button(label="Download as Excel", data=partial(export_excel, filter_key, display_df), file_name="population_data.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        else:
+            st.caption("Too many rows for an Excel sheet; use the CSV download")
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Statistical Summary")
-    stats_df = display_df.describe().T.reset_index().rename(columns={'index': 'Variable'})
-    numeric_cols = stats_df.columns[1:]
-    for col in numeric_cols:
-        stats_df[col] = stats_df[col].map(lambda x: f"{x:,.2f}" if isinstance(x, (int, float)) else x)
-    st.dataframe(stats_df, use_container_width=True, hide_index=True)
+    summary_columns = tuple(col for col in columns_to_display if col != 'region')
+    stats_df = explorer_summary(filter_key, summary_columns, view)
+    stats_df['Variable'] = stats_df['Variable'].map(columns_to_display)
+    st.dataframe(stats_df.style.format("{:,.2f}", subset=analytics.SUMMARY_STATS), use_container_width=True, hide_index=True)
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Custom Visualization")
@@ -856,7 +1374,6 @@ with tab5:
         color_by = st.selectbox("Color By", options=['Region', 'None'], index=0)
     with col2:
         chart_type = st.selectbox("Chart Type", options=['Scatter Plot', 'Bar Chart', 'Line Chart', 'Box Plot'], index=0)
-    rev_columns = {v: k for k, v in columns_to_display.items()}
     if chart_type == 'Scatter Plot':
         if color_by == 'None':
             custom_fig = px.scatter(display_df, x=x_axis, y=y_axis, title=f"{y_axis} vs {x_axis}", opacity=0.7, size='Total Population', hover_name='Region')
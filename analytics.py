@@ -0,0 +1,137 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+RATIO_COLUMNS = ["gender_ratio", "dependency_ratio", "child_woman_ratio"]
+SUMMARY_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def add_ratios(df):
+    """Return a copy of df with gender, dependency and child-woman ratios per cell."""
+    out = df.copy()
+    working_age = df["pop_overall"] - df["pop_0_5"] - df["pop_60_plus"]
+    out["gender_ratio"] = df["pop_men"] / df["pop_women"] * 100
+    out["dependency_ratio"] = (df["pop_0_5"] + df["pop_60_plus"]) / working_age * 100
+    out["child_woman_ratio"] = df["pop_0_5"] / df["pop_women_15_49"] * 1000
+    # Empty cells divide by zero; treat them as missing rather than infinite
+    out[RATIO_COLUMNS] = out[RATIO_COLUMNS].replace([np.inf, -np.inf], np.nan)
+    return out
+
+
+def sort_positions(values, ascending=True):
+    """Row positions that sort values, computed once with a stable argsort (missing values last)."""
+    values = np.asarray(values)
+    if values.dtype.kind not in "fiub":
+        codes = pd.factorize(values, sort=True)[0].astype(float)
+        codes[codes < 0] = np.nan
+        values = codes
+    keys = values.astype(float)
+    if not ascending:
+        keys = -keys
+    return np.argsort(keys, kind="stable")
+
+
+def page_count(n_rows, page_size):
+    """Number of pages needed to show n_rows (at least one)."""
+    return max(1, -(-n_rows // page_size))
+
+
+def page_rows(df, order, columns, page, page_size):
+    """Materialize only the rows and columns of one page, in sorted order."""
+    start = (page - 1) * page_size
+    positions = order[start:start + page_size]
+    return df.iloc[positions, df.columns.get_indexer(columns)]
+
+
+def summarize(df, columns):
+    """describe()-style summary of numeric columns computed in one vectorized pass."""
+    values = df[columns].to_numpy(dtype=float)
+    if len(values) == 0:
+        stats = np.full((len(SUMMARY_STATS), len(columns)), np.nan)
+        stats[0] = 0
+    else:
+        with warnings.catch_warnings():
+            # All-missing columns (e.g. ratios of empty cells) just yield NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            count = np.count_nonzero(~np.isnan(values), axis=0)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0, ddof=1)
+            quantiles = np.nanpercentile(values, [0, 25, 50, 75, 100], axis=0)
+        stats = np.vstack([count, mean, std, quantiles[0], quantiles[1], quantiles[2], quantiles[3], quantiles[4]])
+    summary = pd.DataFrame(stats.T, columns=SUMMARY_STATS)
+    summary.insert(0, "Variable", columns)
+    return summary
+
+
+def build_top_filters(df):
+    """Arrays the top-N sidebar filters are checked against, by row position."""
+    region_codes, region_names = pd.factorize(df["region"])
+    return {
+        "pop_overall": df["pop_overall"].to_numpy(),
+        "region_codes": region_codes,
+        "region_names": list(region_names),
+    }
+
+
+def top_positions(order, filters, n, pop_threshold=None, regions=None):
+    """Row positions of the n largest values that pass the filters.
+
+    order is a precomputed descending order (see sort_positions). It is walked in growing
+    chunks and the filters are checked on those rows only, so the cost depends on n and
+    filter selectivity, not on the row count.
+    """
+    region_ids = None
+    if regions is not None:
+        regions = set(regions)
+        region_ids = [i for i, name in enumerate(filters["region_names"]) if name in regions]
+    found = []
+    n_found = 0
+    start = 0
+    chunk = max(4 * n, 64)
+    while start < len(order) and n_found < n:
+        positions = order[start:start + chunk]
+        keep = np.ones(len(positions), dtype=bool)
+        if pop_threshold is not None:
+            keep &= filters["pop_overall"][positions] >= pop_threshold
+        if region_ids is not None:
+            keep &= np.isin(filters["region_codes"][positions], region_ids)
+        found.append(positions[keep])
+        n_found += int(keep.sum())
+        start += chunk
+        chunk *= 2
+    if not found:
+        return order[:0]
+    return np.concatenate(found)[:n]
+
+
+def focus_summary(df, column, bins=50):
+    """Histogram, box-plot and headline statistics for one demographic focus column."""
+    values = df[column].to_numpy(dtype=float)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    summary = {"column": column, "counts": counts, "edges": edges, "n": len(values)}
+    if len(values) == 0:
+        summary.update(dict.fromkeys(["min", "max", "mean", "median", "sum", "q1", "q3", "lowerfence", "upperfence"], np.nan))
+        return summary
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    summary.update({
+        "min": values.min(),
+        "max": values.max(),
+        "mean": values.mean(),
+        "median": median,
+        "sum": values.sum(),
+        "q1": q1,
+        "q3": q3,
+        "lowerfence": values[values >= q1 - 1.5 * iqr].min(),
+        "upperfence": values[values <= q3 + 1.5 * iqr].max(),
+    })
+    return summary
+
+
+def region_totals(df, columns):
+    """Per-region sums of every column plus the mean coordinates, in one groupby."""
+    aggregations = {"latitude": ("latitude", "mean"), "longitude": ("longitude", "mean")}
+    aggregations.update({col: (col, "sum") for col in columns})
+    return df.groupby("region").agg(**aggregations).reset_index()
@@ -0,0 +1,280 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "Datasets/"
+STORE_DIR = os.path.join(DATA_DIR, "store")
+LEGACY_PATH = "cleaned_lka_2020_subset_50000.csv"
+
+# Raw HDX layer name (without country/year) -> dashboard column
+LAYER_MAP = {
+    "general": "pop_overall",
+    "men": "pop_men",
+    "women": "pop_women",
+    "children_under_five": "pop_0_5",
+    "youth_15_24": "pop_15_24",
+    "elderly_60_plus": "pop_60_plus",
+    "women_of_reproductive_age_15_49": "pop_women_15_49",
+}
+POP_COLUMNS = list(LAYER_MAP.values())
+GRID_KEYS = ["longitude", "latitude"]
+# Coordinates are rounded on write so the same cell lines up across layers and years
+GRID_DECIMALS = 6
+
+RAW_NAME = re.compile(r"^(?P<country>[a-z]{3})_(?P<layer>[a-z0-9_]+?)_(?P<year>\d{4})$")
+MANIFEST_NAME = "manifest.json"
+
+PARTITION_PATH = re.compile(r"country=(?P<country>[^/\\]+)[/\\]year=(?P<year>\d{4})[/\\](?P<column>[^/\\]+)\.csv$")
+
+
+def parse_raw_name(path):
+    """Return (country, year, column) for a raw HDX file, or None if it is not a known layer."""
+    match = RAW_NAME.match(os.path.basename(path).split(".")[0])
+    if match is None or match["layer"] not in LAYER_MAP:
+        return None
+    return match["country"], int(match["year"]), LAYER_MAP[match["layer"]]
+
+
+def partition_path(country, year, column, root=STORE_DIR):
+    """Path of the partition holding one country/year/layer."""
+    return os.path.join(root, f"country={country}", f"year={year}", f"{column}.csv")
+
+
+def read_raw_layer(path, column):
+    """Read a raw HDX layer as longitude/latitude/<column> on the rounded grid."""
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path)
+    value_col = df.columns[-1]
+    df = df[GRID_KEYS + [value_col]].rename(columns={value_col: column})
+    df = df.dropna(subset=GRID_KEYS)
+    df[GRID_KEYS] = df[GRID_KEYS].round(GRID_DECIMALS)
+    df = df.drop_duplicates(subset=GRID_KEYS)
+    return df.fillna(0)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_token(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def partition_key(country, year, column):
+    """Manifest key of one country/year/layer partition."""
+    return f"{country}/{year}/{column}"
+
+
+def manifest_path(root=STORE_DIR):
+    return os.path.join(root, MANIFEST_NAME)
+
+
+def read_manifest(root=STORE_DIR):
+    """Load the store manifest; an empty one if the store has none yet."""
+    path = manifest_path(root)
+    if not os.path.exists(path):
+        return {"partitions": {}}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def write_manifest(manifest, root=STORE_DIR):
+    """Atomically replace the store manifest."""
+    os.makedirs(root, exist_ok=True)
+    tmp_path = manifest_path(root) + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path(root))
+
+
+def store_version(root=STORE_DIR):
+    """Changes whenever the pipeline rewrites the manifest; used to refresh cached listings.
+
+    Stores written without a manifest fall back to the modification times of the store's
+    directories, which change whenever a partition file is added or removed.
+    """
+    path = manifest_path(root)
+    if os.path.exists(path):
+        return os.stat(path).st_mtime_ns
+    if not os.path.isdir(root):
+        return None
+    dirs = [root] + glob.glob(os.path.join(root, "country=*")) + glob.glob(os.path.join(root, "country=*", "year=*"))
+    return "listing:{}:{}".format(len(dirs), max(os.stat(d).st_mtime_ns for d in dirs))
+
+
+def write_partitions(raw_dir=DATA_DIR, root=STORE_DIR, force=False):
+    """Split raw layer files in raw_dir into the country/year/layer store.
+
+    Only partitions whose raw file changed since the manifest was written are rebuilt:
+    an unchanged size/mtime skips the file outright, and an unchanged content hash
+    skips it after hashing. Returns the rebuilt partition paths.
+    """
+    paths = sorted(glob.glob(os.path.join(raw_dir, "*.csv")) + glob.glob(os.path.join(raw_dir, "*.xlsx")))
+    manifest = read_manifest(root)
+    entries = manifest["partitions"]
+    written = []
+    for fp in paths:
+        parsed = parse_raw_name(fp)
+        if parsed is None:
+            continue
+        country, year, column = parsed
+        key = partition_key(country, year, column)
+        out_path = partition_path(country, year, column, root)
+        entry = entries.get(key, {})
+        source_stat = _stat_token(fp)
+        up_to_date = not force and os.path.exists(out_path) and entry.get("source") == fp
+        if up_to_date and entry.get("source_stat") == source_stat:
+            continue
+        source_hash = file_hash(fp)
+        if up_to_date and entry.get("source_hash") == source_hash:
+            entry["source_stat"] = source_stat
+            continue
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        read_raw_layer(fp, column).to_csv(out_path, index=False)
+        entries[key] = {
+            "source": fp,
+            "source_stat": source_stat,
+            "source_hash": source_hash,
+            "path": out_path,
+            "stat": _stat_token(out_path),
+            "hash": file_hash(out_path),
+        }
+        written.append(out_path)
+    write_manifest(manifest, root)
+    return written
+
+
+def list_partitions(root=STORE_DIR):
+    """List store partitions from the directory layout, without reading any data."""
+    rows = []
+    for fp in glob.glob(os.path.join(root, "country=*", "year=*", "*.csv")):
+        match = PARTITION_PATH.search(fp)
+        if match is None or match["column"] not in POP_COLUMNS:
+            continue
+        rows.append((match["country"], int(match["year"]), match["column"], fp))
+    partitions = pd.DataFrame(rows, columns=["country", "year", "column", "path"])
+    return partitions.sort_values(["country", "year", "column"], ignore_index=True)
+
+
+def partition_hash(manifest, country, year, column, path):
+    """Content hash of a partition, taken from the manifest while the file is unchanged.
+
+    Files the manifest does not describe (or that changed behind its back) fall back to
+    a size/mtime token, which still changes whenever the file is rewritten.
+    """
+    entry = manifest["partitions"].get(partition_key(country, year, column))
+    stat = _stat_token(path)
+    if entry is not None and entry.get("stat") == stat:
+        return entry["hash"]
+    return "stat:{}:{}".format(*stat)
+
+
+def with_hashes(partitions, manifest):
+    """Add a hash column to a partition listing."""
+    partitions = partitions.copy()
+    partitions["hash"] = [
+        partition_hash(manifest, row.country, row.year, row.column, row.path)
+        for row in partitions.itertuples()
+    ]
+    return partitions
+
+
+def fingerprint(partitions, columns=None):
+    """Short hash identifying the contents of the listed partitions (optionally only some columns)."""
+    if columns is not None:
+        partitions = partitions[partitions["column"].isin(columns)]
+    digest = hashlib.sha256()
+    for row in partitions.sort_values(["country", "year", "column"]).itertuples():
+        digest.update(f"{partition_key(row.country, row.year, row.column)}={row.hash}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def grid_fingerprint(df):
+    """Short hash of a loaded frame's row layout (country, year and coordinates, in order)."""
+    keys = df[["country", "year"] + GRID_KEYS]
+    return hashlib.sha256(pd.util.hash_pandas_object(keys, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def read_partition(path):
+    """Read one partition indexed by its grid keys."""
+    return pd.read_csv(path).set_index(GRID_KEYS)
+
+
+def missing_layers(parts, columns=None):
+    """Columns absent from each listed country/year, as {(country, year): [column, ...]}.
+
+    load_partitions fills those columns with 0, so callers should tell the user.
+    """
+    columns = list(columns or POP_COLUMNS)
+    missing = {}
+    for key, present in parts.groupby(["country", "year"], sort=True)["column"]:
+        absent = [column for column in columns if column not in set(present)]
+        if absent:
+            missing[key] = absent
+    return missing
+
+
+def load_partitions(countries=None, years=None, columns=None, root=STORE_DIR, read=read_partition):
+    """Load only the selected partitions, one row per grid cell and country/year.
+
+    read(path) returns one partition indexed by grid keys; callers can pass a cached reader.
+    """
+    columns = list(columns or POP_COLUMNS)
+    parts = list_partitions(root)
+    if countries is not None:
+        parts = parts[parts["country"].isin(countries)]
+    if years is not None:
+        parts = parts[parts["year"].isin(years)]
+    parts = parts[parts["column"].isin(columns)]
+
+    frames = []
+    for (country, year), group in parts.groupby(["country", "year"], sort=True):
+        layers = [read(fp) for fp in group["path"]]
+        merged = pd.concat(layers, axis=1, join="outer")
+        merged = merged.reindex(columns=columns).fillna(0).reset_index()
+        merged.insert(0, "country", country)
+        merged.insert(1, "year", year)
+        frames.append(merged)
+    if not frames:
+        return pd.DataFrame(columns=["country", "year"] + GRID_KEYS + columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_legacy(path=LEGACY_PATH):
+    """Load the pre-store single-file subset, tagged as Sri Lanka 2020."""
+    df = pd.read_csv(path)
+    df.insert(0, "country", "lka")
+    df.insert(1, "year", 2020)
+    return df
+
+
+def legacy_fingerprint(path=LEGACY_PATH):
+    """Cache key for the legacy single-file subset; changes whenever the file is rewritten."""
+    return "legacy:{}:{}".format(*_stat_token(path))
+
+
+def year_over_year(base_df, compare_df, columns=None):
+    """Align two years on (country, grid cell) and compute per-cell change for each column."""
+    columns = list(columns or POP_COLUMNS)
+    keys = ["country"] + GRID_KEYS
+    base = base_df[keys + columns].set_index(keys)
+    compare = compare_df[keys + columns].set_index(keys)
+    aligned = base.join(compare, how="inner", lsuffix="_base", rsuffix="_compare")
+    for col in columns:
+        change = aligned[f"{col}_compare"] - aligned[f"{col}_base"]
+        aligned[f"{col}_change"] = change
+        aligned[f"{col}_pct_change"] = change / aligned[f"{col}_base"].replace(0, np.nan) * 100
+    return aligned.reset_index()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+import analytics
+
+# region -> district -> coarse grid -> cell. The data has no admin boundaries, so
+# districts and coarse cells are fixed-size blocks nested inside each region.
+LEVELS = ["region", "district", "coarse", "cell"]
+DISTRICT_DEGREES = 0.5
+COARSE_DEGREES = 0.1
+
+
+def _block(values, size):
+    # Small epsilon so coordinates sitting exactly on a block edge are not split by float error
+    return np.floor(values / size + 1e-9).astype(np.int64)
+
+
+def _block_label(x, y, size):
+    return f"{y * size:.1f}°N {x * size:.1f}°E"
+
+
+def build_hierarchy(df, columns):
+    """Aggregate cells to coarse blocks, districts and regions in one bottom-up pass.
+
+    Cells are sorted once by (region, district, coarse block); coarse sums are segment
+    sums over that order and every higher level is aggregated from the level below it.
+    """
+    region_codes, region_names = pd.factorize(df["region"], sort=True)
+    lon = df["longitude"].to_numpy(dtype=float)
+    lat = df["latitude"].to_numpy(dtype=float)
+    keys = [region_codes, _block(lon, DISTRICT_DEGREES), _block(lat, DISTRICT_DEGREES),
+            _block(lon, COARSE_DEGREES), _block(lat, COARSE_DEGREES)]
+    order = np.lexsort(keys[::-1])
+    sorted_keys = [key[order] for key in keys]
+
+    n = len(order)
+    change = np.zeros(n, dtype=bool)
+    change[:1] = True
+    for key in sorted_keys:
+        change[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(change)
+    stops = np.append(starts[1:], n)
+
+    values = np.column_stack([df[col].to_numpy(dtype=float) for col in columns] + [lon, lat])[order]
+    sums = np.add.reduceat(values, starts, axis=0) if n else np.zeros((0, len(columns) + 2))
+    region, dx, dy, cx, cy = (key[starts] for key in sorted_keys)
+
+    coarse = pd.DataFrame(sums[:, :len(columns)], columns=columns)
+    coarse.insert(0, "region", np.asarray(region_names)[region])
+    coarse.insert(1, "district", [_block_label(x, y, DISTRICT_DEGREES) for x, y in zip(dx, dy)])
+    coarse.insert(2, "coarse", [_block_label(x, y, COARSE_DEGREES) for x, y in zip(cx, cy)])
+    coarse["cells"] = stops - starts
+    coarse["lon_sum"] = sums[:, -2]
+    coarse["lat_sum"] = sums[:, -1]
+    coarse["start"] = starts
+    coarse["stop"] = stops
+
+    totals = columns + ["cells", "lon_sum", "lat_sum"]
+    district = coarse.groupby(["region", "district"], sort=False)[totals].sum().reset_index()
+    regions = district.groupby("region", sort=False)[totals].sum().reset_index()
+    return {
+        "columns": list(columns),
+        "order": order,
+        "cells": df[["longitude", "latitude"] + list(columns)],
+        "tables": {"region": regions, "district": district, "coarse": coarse},
+    }
+
+
+def _finish(table, key, column):
+    out = table.rename(columns={key: "label"})
+    out["longitude"] = out["lon_sum"] / out["cells"]
+    out["latitude"] = out["lat_sum"] / out["cells"]
+    if column in analytics.RATIO_COLUMNS:
+        # Ratios are recomputed from the rolled-up sums, not averaged from the level below
+        out["value"] = analytics.add_ratios(out)[column]
+    else:
+        out["value"] = out[column]
+    return out[["label", "value", "cells", "longitude", "latitude"]].reset_index(drop=True)
+
+
+def children(hierarchy, path, column="pop_overall"):
+    """Drill down: the rows one level below path ([], [region], [region, district], ...)."""
+    level = LEVELS[len(path)]
+    if level == "cell":
+        block = node_table(hierarchy, path)
+        positions = np.concatenate([hierarchy["order"][start:stop] for start, stop in zip(block["start"], block["stop"])])
+        cells = hierarchy["cells"].iloc[positions]
+        if column in analytics.RATIO_COLUMNS:
+            values = analytics.add_ratios(cells)[column]
+        else:
+            values = cells[column]
+        return pd.DataFrame({
+            "label": [f"{y:.4f}°N {x:.4f}°E" for x, y in zip(cells["longitude"], cells["latitude"])],
+            "value": values.to_numpy(),
+            "cells": 1,
+            "longitude": cells["longitude"].to_numpy(),
+            "latitude": cells["latitude"].to_numpy(),
+        })
+    table = hierarchy["tables"][level]
+    for key, label in zip(LEVELS, path):
+        table = table[table[key] == label]
+    return _finish(table, level, column)
+
+
+def node_table(hierarchy, path):
+    """The rows of the deepest aggregated level that fall under path."""
+    level = LEVELS[max(len(path), 1) - 1]
+    table = hierarchy["tables"][level]
+    for key, label in zip(LEVELS, path):
+        table = table[table[key] == label]
+    return table
+
+
+def roll_up(hierarchy, path, column="pop_overall"):
+    """Roll up: a single row summarizing everything under path ([] for the whole dataset)."""
+    table = node_table(hierarchy, path)
+    totals = table[hierarchy["columns"] + ["cells", "lon_sum", "lat_sum"]].sum().to_frame().T.astype(float)
+    totals.insert(0, "label", path[-1] if path else "All")
+    return _finish(totals, "label", column).iloc[0]
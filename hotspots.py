@@ -0,0 +1,296 @@
+import numpy as np
+import pandas as pd
+
+import analytics
+import data_store
+import map_layers
+
+# Cells are binned onto a regular lon/lat raster per country, so a neighborhood is a
+# (2r+1)×(2r+1) window and every neighborhood sum is four lookups in a summed-area table.
+RESOLUTIONS = [0.005, 0.01, 0.02, 0.05]
+METERS_PER_DEGREE = 111_320
+Z_95 = 1.96
+Z_99 = 2.576
+
+GI_COLORS = {
+    "Hot spot (99%)": [215, 25, 28],
+    "Hot spot (95%)": [253, 174, 97],
+    "Cold spot (95%)": [171, 217, 233],
+    "Cold spot (99%)": [44, 123, 182],
+}
+MORAN_COLORS = {
+    "High-High": [215, 25, 28],
+    "Low-Low": [44, 123, 182],
+    "High-Low": [253, 174, 97],
+    "Low-High": [171, 217, 233],
+}
+CLUSTER_COLORS = [
+    [228, 26, 28], [55, 126, 184], [77, 175, 74], [152, 78, 163], [255, 127, 0],
+    [166, 86, 40], [247, 129, 191], [153, 153, 153], [255, 217, 47], [27, 158, 119],
+]
+NOT_SIGNIFICANT = "Not significant"
+
+
+def rasterize(df, resolution):
+    """Sum every pop_* column onto one raster per country (only occupied raster cells are stored)."""
+    rasters = {}
+    for country, cells in df.groupby("country", sort=True):
+        lon = cells["longitude"].to_numpy(dtype=float)
+        lat = cells["latitude"].to_numpy(dtype=float)
+        x0 = np.floor(lon.min() / resolution) * resolution
+        y0 = np.floor(lat.min() / resolution) * resolution
+        col = np.floor((lon - x0) / resolution + 1e-9).astype(np.int64)
+        row = np.floor((lat - y0) / resolution + 1e-9).astype(np.int64)
+        shape = (int(row.max()) + 1, int(col.max()) + 1)
+        flat, codes = np.unique(row * shape[1] + col, return_inverse=True)
+        sums = pd.DataFrame({
+            column: np.bincount(codes, weights=cells[column].to_numpy(dtype=float), minlength=len(flat))
+            for column in data_store.POP_COLUMNS
+        })
+        rasters[country] = {
+            "shape": shape,
+            "origin": (x0, y0),
+            "resolution": resolution,
+            "flat": flat,
+            "sums": sums,
+            "cells": np.bincount(codes, minlength=len(flat)),
+        }
+    return rasters
+
+
+def raster_values(raster, column):
+    """Per occupied raster cell: the summed column, or a ratio recomputed from the sums."""
+    if column in analytics.RATIO_COLUMNS:
+        return analytics.add_ratios(raster["sums"])[column].to_numpy(dtype=float)
+    return raster["sums"][column].to_numpy(dtype=float)
+
+
+def window_sum(grid, radius):
+    """Sum of the (2r+1)×(2r+1) window around every raster cell, treating outside cells as zero."""
+    size = 2 * radius + 1
+    padded = np.pad(grid, radius)
+    table = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    table[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    return table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+
+
+def _dense(shape, flat, values):
+    grid = np.zeros(shape)
+    grid.flat[flat] = values
+    return grid
+
+
+def local_statistics(shape, flat, values, radius):
+    """Getis-Ord Gi* and local Moran's I (with its randomization z-score) for each occupied cell.
+
+    Neighbors are the occupied cells in the window; Gi* uses binary weights including the
+    cell itself, Moran's I row-standardized weights over the other cells. lag is the mean
+    deviation from the overall mean among those other cells.
+    """
+    n = len(values)
+    out = pd.DataFrame({name: np.zeros(n) for name in ["neighbors", "gi", "lag", "moran_i", "moran_z"]})
+    mean = values.mean() if n else 0.0
+    std = values.std() if n else 0.0
+    if n < 3 or std == 0:
+        return out
+
+    weights = window_sum(_dense(shape, flat, 1.0), radius).flat[flat]
+    window = window_sum(_dense(shape, flat, values), radius).flat[flat]
+    spread = std * np.sqrt((n * weights - weights ** 2) / (n - 1))
+    out["gi"] = np.divide(window - mean * weights, spread, out=np.zeros(n), where=spread > 0)
+
+    z = values - mean
+    m2 = (z ** 2).mean()
+    b2 = (z ** 4).mean() / m2 ** 2
+    k = weights - 1
+    has_neighbors = k > 0
+    lag = np.divide(window_sum(_dense(shape, flat, z), radius).flat[flat] - z, k, out=np.zeros(n), where=has_neighbors)
+    moran = z * lag / m2
+    expected = -1 / (n - 1)
+    # Row-standardized weights: sum w_ij^2 = 1/k and sum_{j != h} w_ij w_ih = 1 - 1/k
+    inverse_k = np.divide(1.0, k, out=np.zeros(n), where=has_neighbors)
+    variance = inverse_k * (n - b2) / (n - 1) + (1 - inverse_k) * (2 * b2 - n) / ((n - 1) * (n - 2)) - expected ** 2
+    valid = has_neighbors & (variance > 0)
+    out["neighbors"] = k
+    out["lag"] = lag
+    out["moran_i"] = np.where(has_neighbors, moran, 0.0)
+    out["moran_z"] = np.divide(moran - expected, np.sqrt(np.where(valid, variance, 1.0)), out=np.zeros(n), where=valid)
+    return out
+
+
+def _components(n_nodes, src, dst):
+    """Connected-component labels by repeated min-label hooking with pointer jumping."""
+    labels = np.arange(n_nodes)
+    while len(src):
+        low = np.minimum(labels[src], labels[dst])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[src], low)
+        np.minimum.at(hooked, labels[dst], low)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            break
+        labels = hooked
+    return labels
+
+
+def _offsets(radius, half=False):
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            if (dy, dx) == (0, 0) or (half and (dy, dx) < (0, 0)):
+                continue
+            yield dy, dx
+
+
+def _neighbor_nodes(shape, node, flat, dy, dx):
+    """Node id at offset (dy, dx) of each raster cell in flat (-1 if outside the raster or not a node)."""
+    rows, cols = np.divmod(flat, shape[1])
+    rows, cols = rows + dy, cols + dx
+    inside = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    found = np.full(len(flat), -1)
+    found[inside] = node[rows[inside] * shape[1] + cols[inside]]
+    return found
+
+
+def density_clusters(shape, flat, values, radius, quantile, min_cells):
+    """DBSCAN-style clusters of high-value cells; -1 marks cells outside any cluster.
+
+    Cells at or above the value quantile are "high". A high cell with at least min_cells
+    high cells in its window (itself included) is a core cell; core cells within a window
+    of each other share a cluster, and other high cells join a core cell in their window.
+    """
+    labels = np.full(len(values), -1)
+    if not len(values):
+        return labels
+    high = values >= np.quantile(values, quantile)
+    high_grid = _dense(shape, flat[high], 1.0)
+    core = high & (window_sum(high_grid, radius).flat[flat] >= min_cells - 0.5)
+    core_flat = flat[core]
+    node = np.full(shape[0] * shape[1], -1)
+    node[core_flat] = np.arange(len(core_flat))
+
+    src, dst = [], []
+    for dy, dx in _offsets(radius, half=True):
+        found = _neighbor_nodes(shape, node, core_flat, dy, dx)
+        linked = found >= 0
+        src.append(np.flatnonzero(linked))
+        dst.append(found[linked])
+    roots = _components(len(core_flat), np.concatenate(src), np.concatenate(dst))
+    core_labels = np.unique(roots, return_inverse=True)[1] if len(roots) else roots
+    labels[core] = core_labels
+
+    border = np.flatnonzero(high & ~core)
+    for dy, dx in _offsets(radius):
+        unassigned = border[labels[border] < 0]
+        if not len(unassigned):
+            break
+        found = _neighbor_nodes(shape, node, flat[unassigned], dy, dx)
+        labels[unassigned[found >= 0]] = core_labels[found[found >= 0]]
+
+    # Number clusters by total value, largest first
+    clustered = labels >= 0
+    if clustered.any():
+        totals = np.bincount(labels[clustered], weights=values[clustered])
+        rank = np.empty(len(totals), dtype=int)
+        rank[np.argsort(-totals, kind="stable")] = np.arange(len(totals))
+        labels[clustered] = rank[labels[clustered]]
+    return labels
+
+
+def gi_classes(gi):
+    """Hot/cold spot label of each Gi* z-score.
+
+    >>> gi_classes([3.0, 2.0, 0.0, -2.0, -3.0]).tolist()
+    ['Hot spot (99%)', 'Hot spot (95%)', 'Not significant', 'Cold spot (95%)', 'Cold spot (99%)']
+    """
+    gi = np.asarray(gi, dtype=float)
+    return np.select(
+        [gi >= Z_99, gi >= Z_95, gi <= -Z_99, gi <= -Z_95],
+        ["Hot spot (99%)", "Hot spot (95%)", "Cold spot (99%)", "Cold spot (95%)"],
+        NOT_SIGNIFICANT,
+    )
+
+
+def analyze(rasters, column, radius=1, quantile=0.9, min_cells=4):
+    """Hotspot statistics and density clusters for one column, one row per occupied raster cell."""
+    frames = []
+    next_cluster = 0
+    for country, raster in rasters.items():
+        values = raster_values(raster, column)
+        # Ratios are undefined where the denominator is empty; those cells are left out
+        keep = np.isfinite(values)
+        flat, values = raster["flat"][keep], values[keep]
+        stats = local_statistics(raster["shape"], flat, values, radius)
+        clusters = density_clusters(raster["shape"], flat, values, radius, quantile, min_cells)
+        rows, cols = np.divmod(flat, raster["shape"][1])
+        x0, y0 = raster["origin"]
+        frame = pd.DataFrame({
+            "country": country,
+            "longitude": x0 + (cols + 0.5) * raster["resolution"],
+            "latitude": y0 + (rows + 0.5) * raster["resolution"],
+            "value": values,
+            "cells": raster["cells"][keep],
+            "pop_overall": raster["sums"]["pop_overall"].to_numpy()[keep],
+        })
+        frame = pd.concat([frame, stats], axis=1)
+        frame["cluster"] = np.where(clusters >= 0, clusters + next_cluster, -1)
+        next_cluster = frame["cluster"].max() + 1 if (clusters >= 0).any() else next_cluster
+        high = values >= values.mean() if len(values) else np.zeros(0, dtype=bool)
+        high_lag = stats["lag"].to_numpy() >= 0
+        frame["moran_class"] = np.select(
+            [stats["moran_z"].abs() < Z_95, high & high_lag, ~high & ~high_lag, high],
+            [NOT_SIGNIFICANT, "High-High", "Low-Low", "High-Low"], "Low-High",
+        )
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["country", "longitude", "latitude", "value", "cells", "pop_overall", "neighbors",
+                                     "gi", "lag", "moran_i", "moran_z", "cluster", "moran_class", "gi_class"])
+    results = pd.concat(frames, ignore_index=True)
+    results["gi_class"] = gi_classes(results["gi"])
+    return results
+
+
+def global_moran_i(results):
+    """Global Moran's I with row-standardized weights: the mean local I over cells that have neighbors."""
+    connected = results["neighbors"] > 0
+    return float(results.loc[connected, "moran_i"].sum() / connected.sum()) if connected.any() else float("nan")
+
+
+def cluster_summary(results):
+    """One row per density cluster: size, summed population and centroid."""
+    clustered = results[results["cluster"] >= 0]
+    summary = clustered.groupby("cluster").agg(
+        raster_cells=("cells", "size"),
+        population=("pop_overall", "sum"),
+        mean_value=("value", "mean"),
+        longitude=("longitude", "mean"),
+        latitude=("latitude", "mean"),
+    ).reset_index()
+    summary["cluster"] = summary["cluster"] + 1
+    return summary
+
+
+def layer_frame(results, layer):
+    """Slim map data for one result layer: significant (or clustered) raster cells with a color and label."""
+    if layer == "Getis-Ord Gi*":
+        shown = results[results["gi_class"] != NOT_SIGNIFICANT]
+        kind, stat, colors = shown["gi_class"], shown["gi"], [GI_COLORS[label] for label in shown["gi_class"]]
+    elif layer == "Local Moran's I":
+        shown = results[results["moran_class"] != NOT_SIGNIFICANT]
+        kind, stat, colors = shown["moran_class"], shown["moran_z"], [MORAN_COLORS[label] for label in shown["moran_class"]]
+    else:
+        shown = results[results["cluster"] >= 0]
+        kind = "Cluster " + (shown["cluster"] + 1).astype(str)
+        stat = shown["value"]
+        colors = [CLUSTER_COLORS[label % len(CLUSTER_COLORS)] for label in shown["cluster"]]
+    return pd.DataFrame({
+        "lon": np.round(shown["longitude"].to_numpy(), map_layers.POSITION_DECIMALS),
+        "lat": np.round(shown["latitude"].to_numpy(), map_layers.POSITION_DECIMALS),
+        "v": np.round(shown["value"].to_numpy(), 2),
+        "s": np.round(np.asarray(stat, dtype=float), 2),
+        "k": np.asarray(kind),
+        "c": colors,
+    })
@@ -0,0 +1,246 @@
+"""Local load test: many simulated sessions rerunning Main.py concurrently.
+
+Usage:
+    python load_test.py --sessions 20 --actions 15 --concurrency 8
+
+Each session is a Streamlit AppTest instance. AppTest swaps process-wide runtime state on
+every run, so it is not safe to use from several threads; sessions instead run in worker
+processes, one at a time per worker. Sessions in the same worker share the app's caches
+and background pool the way browser sessions share one server. Sessions apply random
+sidebar filters, demographic focus, map types, explorer paging and exports, and the
+script reports rerun latency percentiles, throughput, failed reruns and memory growth.
+Failed reruns are listed by exception and left out of the latency figures.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+# Deferred download callables registered by st.download_button, by file id. The browser
+# runs one when its button is clicked; the export action does the same.
+DEFERRED = {}
+_add_deferred = MediaFileManager.add_deferred
+
+
+def _record_deferred(self, data_callable, *args, **kwargs):
+    file_id = _add_deferred(self, data_callable, *args, **kwargs)
+    DEFERRED[file_id] = data_callable
+    return file_id
+
+
+def rss_bytes():
+    """Resident memory of this process (Linux /proc)."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+
+def set_threshold(at, rng):
+    slider = widget(at.slider, "Minimum Population")
+    low, high = int(slider.min), int(slider.max)
+    # Stay in the lower quarter so most filters keep a realistic share of the rows
+    return slider.set_value(low + rng.randrange(0, max((high - low) // 4, 1) + 1, 100))
+
+
+def set_regions(at, rng):
+    regions = widget(at.multiselect, "Regions")
+    return regions.set_value(rng.sample(regions.options, rng.randint(1, len(regions.options))))
+
+
+def set_focus(at, rng):
+    focus = widget(at.selectbox, "Demographic Focus")
+    return focus.set_value(rng.choice(focus.options))
+
+
+def set_map_type(at, rng):
+    map_type = widget(at.radio, "Map Type")
+    return map_type.set_value(rng.choice(map_type.options))
+
+
+def browse_table(at, rng):
+    if widget(at.radio, "Table Mode").value != "Paginated":
+        return widget(at.radio, "Table Mode").set_value("Paginated")
+    if rng.random() < 0.5:
+        sort_by = widget(at.selectbox, "Sort By")
+        return sort_by.set_value(rng.choice(sort_by.options))
+    page = widget(at.number_input, "Page")
+    return page.set_value(rng.randint(1, int(page.max)))
+
+
+def set_top_n(at, rng):
+    top_n = widget(at.select_slider, "Number of Centers")
+    return top_n.set_value(rng.choice(top_n.options))
+
+
+def rerun(at, rng):
+    return at
+
+
+def export(at, rng):
+    # Fetch one of the explorer downloads, building the file like a click on its button
+    buttons = [button for button in at.get("download_button") if button.proto.deferred_file_id]
+    if not buttons:
+        raise RuntimeError("no deferred download buttons rendered")
+    data = DEFERRED[rng.choice(buttons).proto.deferred_file_id]()
+    if not len(data):
+        raise RuntimeError("empty export")
+    return None
+
+
+ACTIONS = {
+    "threshold": set_threshold,
+    "regions": set_regions,
+    "focus": set_focus,
+    "map_type": set_map_type,
+    "table": browse_table,
+    "top_n": set_top_n,
+    "export": export,
+}
+
+
+def run_errors(at):
+    """Error messages of a finished run; a run that rendered nothing (e.g. the script did not compile) is a failure."""
+    errors = [f"{exc.proto.type or 'Exception'}: {exc.proto.message}" for exc in at.exception]
+    if not errors and not at.main.children:
+        errors.append("EmptyRun: the script rendered no elements")
+    return errors
+
+
+def run_action(at, action, rng):
+    """Run one action and return (latency, errors)."""
+    start = time.perf_counter()
+    try:
+        rerun = action(at, rng)
+        if rerun is not None:
+            # Only the buttons rendered by this run can be clicked afterwards
+            DEFERRED.clear()
+            rerun.run()
+            errors = run_errors(at)
+        else:
+            errors = []
+    except Exception as exc:
+        errors = [f"{type(exc).__name__}: {exc}"]
+    return time.perf_counter() - start, errors
+
+
+def run_session(session_id, script, n_actions, seed, timeout):
+    """One simulated session; returns its (action, latency, errors) records and this worker's memory use."""
+    MediaFileManager.add_deferred = _record_deferred
+    rng = random.Random(seed + session_id)
+    rss_start = rss_bytes()
+    at = AppTest.from_file(script, default_timeout=timeout)
+    latency, errors = run_action(at, rerun, rng)
+    records = [("initial", latency, errors)]
+    for _ in range(n_actions):
+        name = rng.choice(list(ACTIONS))
+        if name == "export":
+            # A download needs the buttons of the current view: rerun, then build the file
+            latency, errors = run_action(at, rerun, rng)
+            if not errors:
+                build, errors = run_action(at, export, rng)
+                latency += build
+        else:
+            latency, errors = run_action(at, ACTIONS[name], rng)
+        records.append((name, latency, errors))
+    return {"records": records, "pid": os.getpid(), "rss_start": rss_start, "rss_end": rss_bytes()}
+
+
+def _percentiles(latencies):
+    if not len(latencies):
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(latencies.max()),
+    }
+
+
+def summarize(sessions, wall_seconds):
+    results = [record for session in sessions for record in session["records"]]
+    # Failed reruns are counted and listed, but their latency is not a rerun time
+    ok = [(name, latency) for name, latency, errors in results if not errors]
+    by_action = {}
+    for name, latency in ok:
+        by_action.setdefault(name, []).append(latency)
+    failures = Counter(f"{name}: {error}" for name, _, errors in results for error in errors)
+
+    # Memory per worker process: from before its first session to after its last one
+    workers = {}
+    for session in sessions:
+        first, _ = workers.get(session["pid"], (session["rss_start"], None))
+        workers[session["pid"]] = (first, session["rss_end"])
+    rss_start = sum(first for first, _ in workers.values())
+    rss_end = sum(last for _, last in workers.values())
+    return {
+        "sessions": len(sessions),
+        "workers": len(workers),
+        "reruns": len(results),
+        "errors": len(results) - len(ok),
+        "error_messages": dict(failures.most_common()),
+        "wall_seconds": wall_seconds,
+        "throughput_reruns_per_second": len(ok) / wall_seconds,
+        "latency_seconds": _percentiles(np.array([latency for _, latency in ok])),
+        "p95_by_action_seconds": {name: float(np.percentile(values, 95)) for name, values in sorted(by_action.items())},
+        "rss_start_mb": rss_start / 1024 ** 2,
+        "rss_end_mb": rss_end / 1024 ** 2,
+        "rss_growth_per_session_mb": (rss_end - rss_start) / 1024 ** 2 / len(sessions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default="Main.py", help="Streamlit script to drive")
+    parser.add_argument("--sessions", type=int, default=10, help="number of simulated sessions")
+    parser.add_argument("--actions", type=int, default=10, help="random interactions per session")
+    parser.add_argument("--concurrency", type=int, default=4, help="worker processes running sessions at the same time")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    # Tasks are looked up in the workers by module name: running the app replaces __main__ there
+    import load_test
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(load_test.run_session, i, args.script, args.actions, args.seed, args.timeout)
+            for i in range(args.sessions)
+        ]
+        sessions = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - start
+    report = summarize(sessions, wall_seconds)
+
+    print(f"{report['sessions']} sessions on {report['workers']} workers, {report['reruns']} reruns, "
+          f"{report['errors']} failed in {wall_seconds:.1f}s")
+    for message, count in report["error_messages"].items():
+        print(f"  {count:>4} x {message}")
+    print(f"Throughput: {report['throughput_reruns_per_second']:.2f} successful reruns/s")
+    latency = report["latency_seconds"]
+    if latency["p50"] is not None:
+        print(f"Rerun latency: p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    for name, p95 in report["p95_by_action_seconds"].items():
+        print(f"  {name:<10} p95 {p95:.3f}s")
+    print(f"Memory: {report['rss_start_mb']:.0f} MB -> {report['rss_end_mb']:.0f} MB "
+          f"({report['rss_growth_per_session_mb']:.1f} MB per session)")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Streamlit sends pydeck layers to the browser as JSON records (pydeck's binary
+# transport only works in Jupyter), so the payload is kept small instead: short field
+# names, rounded coordinates (5 decimals is about 1 m) and accessor values computed here
+# rather than per point in the browser.
+POSITION_DECIMALS = 5
+VALUE_DECIMALS = 1
+RADIUS_DIVISOR = 20
+ELEVATION_DIVISOR = 50
+
+# Frames are held in caches as float32 (half the memory of float64); layer_data widens
+# and re-rounds them so the JSON shows the intended decimals, not float32 artifacts.
+# float32 resolves longitudes near ±180 to about 1.5e-5 degrees, still under 2 m.
+FIELD_DECIMALS = {"lon": POSITION_DECIMALS, "lat": POSITION_DECIMALS, "v": VALUE_DECIMALS, "r": 2, "e": 2}
+FRAME_DTYPE = np.float32
+
+LAYER_FIELDS = {
+    "Heat Map": ["lon", "lat", "v"],
+    "Scatter Plot": ["lon", "lat", "r", "v"],
+    "3D Elevation": ["lon", "lat", "e"],
+}
+
+
+def layer_frame(df, column):
+    """Per-point map data for one column: rounded position, value, radius and elevation."""
+    values = df[column].to_numpy(dtype=float)
+    return pd.DataFrame({
+        "lon": np.round(df["longitude"].to_numpy(dtype=float), POSITION_DECIMALS),
+        "lat": np.round(df["latitude"].to_numpy(dtype=float), POSITION_DECIMALS),
+        "v": np.round(values, VALUE_DECIMALS),
+        "r": np.round(values / RADIUS_DIVISOR, 2),
+        "e": np.round(values / ELEVATION_DIVISOR, 2),
+    }).astype(FRAME_DTYPE)
+
+
+def frame_bytes(n_rows):
+    """Memory held by one layer_frame of n_rows points."""
+    return n_rows * len(FIELD_DECIMALS) * np.dtype(FRAME_DTYPE).itemsize
+
+
+def layer_data(frame, map_type):
+    """Only the fields the given map type reads, as rounded float64."""
+    fields = LAYER_FIELDS[map_type]
+    return frame[fields].astype(float).round({field: FIELD_DECIMALS[field] for field in fields})
+
+
+def _deck_json_size(data):
+    # pydeck nests layer data at this depth and serializes with indent=2
+    return len(json.dumps({"layers": [{"data": data.to_dict(orient="records")}]}, indent=2, default=str))
+
+
+def payload_sizes(df, frame, map_type, sample_size=2000):
+    """Estimated JSON bytes for the map data before (all columns) and after slimming.
+
+    Both are extrapolated from the same row sample so the estimate stays cheap on large views.
+    """
+    n = len(df)
+    if n == 0:
+        return 0, 0
+    rows = np.linspace(0, n - 1, min(n, sample_size)).astype(int)
+    before = _deck_json_size(df.iloc[rows])
+    after = _deck_json_size(layer_data(frame, map_type).iloc[rows])
+    scale = n / len(rows)
+    return int(before * scale), int(after * scale)
@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def result_size(value):
+    """Approximate memory held by a cached result, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class Precomputer:
+    """Speculatively runs computations on a small thread pool and keeps the results in a bounded LRU cache.
+
+    Keys must identify their inputs (e.g. include the filter state), so a result is valid
+    whenever its key matches. Each owner (one browser session) has a single batch of
+    queued work; scheduling a new batch cancels queued tasks nobody needs any more.
+    Owners are forgotten once their batch has finished, and at most max_owners batches
+    (the most recently scheduled) are tracked at a time.
+    """
+
+    def __init__(self, max_workers=None, max_bytes=256 * 1024 ** 2, max_owners=256):
+        if max_workers is None:
+            # Leave half the cores for the reruns themselves
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        self.max_bytes = max_bytes
+        self.max_owners = max_owners
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="precompute")
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._pending = {}
+        self._batches = OrderedDict()
+
+    def _store(self, key, result):
+        size = result_size(result)
+        with self._lock:
+            if key in self._results or size > self.max_bytes:
+                return
+            self._results[key] = result
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, _ = self._results.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def _run(self, key, fn, args):
+        try:
+            result = fn(*args)
+            self._store(key, result)
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def get_or_compute(self, key, fn, *args):
+        """Return the cached result for key, waiting on or running its computation if needed."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except CancelledError:
+                pass
+        result = fn(*args)
+        self._store(key, result)
+        return result
+
+    def reserve(self, nbytes):
+        """Grow the byte budget to at least nbytes, e.g. what a full batch needs; it never shrinks."""
+        with self._lock:
+            self.max_bytes = max(self.max_bytes, nbytes)
+
+    def schedule(self, owner, tasks):
+        """Queue (key, fn, *args) tasks for owner, cancelling its previous batch's queued work.
+
+        Tasks whose results have been evicted are queued again even if the batch is unchanged.
+        """
+        keys = {task[0] for task in tasks}
+        with self._lock:
+            previous = self._batches.pop(owner, set())
+            # Finished batches (closed or idle sessions) no longer hold on to their keys
+            for other, other_keys in list(self._batches.items()):
+                if not any(key in self._pending for key in other_keys):
+                    del self._batches[other]
+            self._batches[owner] = keys
+            while len(self._batches) > self.max_owners:
+                self._batches.popitem(last=False)
+            still_wanted = set().union(*self._batches.values())
+            for key in previous - still_wanted:
+                future = self._pending.get(key)
+                if future is not None and future.cancel():
+                    del self._pending[key]
+            for key, fn, *args in tasks:
+                if key in self._results or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._run, key, fn, args)
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+# Cell components the engine projects. "other" is everyone outside the three published
+# age layers (6-14 and 25-59); the *_male fields carry each cell's male share so
+# pyramids can be split by sex after projection.
+FIELDS = [
+    "children", "youth", "other", "elderly",
+    "children_male", "youth_male", "other_male", "elderly_male",
+    "women_15_49",
+]
+# Which growth factor applies to each field: ageing shrinks the young, grows the old
+FACTOR_OF = {
+    "children": "young", "youth": "young", "children_male": "young", "youth_male": "young",
+    "other": "adult", "other_male": "adult", "women_15_49": "adult",
+    "elderly": "old", "elderly_male": "old",
+}
+FACTOR_FIELDS = {
+    name: [FIELDS.index(field) for field in FIELDS if FACTOR_OF[field] == name]
+    for name in ("young", "adult", "old")
+}
+AGE_GROUPS = ["0-5", "15-24", "6-14 & 25-59", "60+"]
+
+
+def base_cells(df):
+    """Per-cell component matrix (cells × FIELDS), region codes and a density score."""
+    overall = df["pop_overall"].to_numpy(dtype=float)
+    children = df["pop_0_5"].to_numpy(dtype=float)
+    youth = df["pop_15_24"].to_numpy(dtype=float)
+    elderly = df["pop_60_plus"].to_numpy(dtype=float)
+    other = np.clip(overall - children - youth - elderly, 0, None)
+    men = df["pop_men"].to_numpy(dtype=float)
+    sexed = men + df["pop_women"].to_numpy(dtype=float)
+    male_share = np.divide(men, sexed, out=np.full_like(men, 0.5), where=sexed > 0)
+    values = np.column_stack([
+        children, youth, other, elderly,
+        children * male_share, youth * male_share, other * male_share, elderly * male_share,
+        df["pop_women_15_49"].to_numpy(dtype=float),
+    ])
+    region_codes, region_names = pd.factorize(df["region"], sort=True)
+    log_density = np.log1p(overall)
+    density_z = (log_density - log_density.mean()) / (log_density.std() or 1.0) if len(overall) else log_density
+    return {
+        "values": values,
+        "region_codes": region_codes,
+        "regions": list(region_names),
+        "density_z": density_z,
+        "longitude": df["longitude"].to_numpy(dtype=float),
+        "latitude": df["latitude"].to_numpy(dtype=float),
+    }
+
+
+def sample_scenarios(n, n_regions, growth, ageing, migration, urban_pull=(0.0, 0.0), seed=0):
+    """Draw n scenarios uniformly from (low, high) annual rates.
+
+    Growth and ageing are national; migration is drawn per region; urban pull adds
+    migration proportional to each cell's density score, which makes it a per-cell rate.
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "growth": rng.uniform(*growth, n),
+        "ageing": rng.uniform(*ageing, n),
+        "migration": rng.uniform(*migration, (n, n_regions)),
+        "urban_pull": rng.uniform(*urban_pull, n),
+    }
+
+
+def _factors(growth, ageing, migration, years):
+    adult = (1 + growth + migration) ** years
+    return {
+        "young": adult * (1 - ageing) ** years,
+        "adult": adult,
+        "old": adult * (1 + ageing) ** years,
+    }
+
+
+def run_sweep(base, scenarios, years, chunk_elements=4_000_000):
+    """Project every scenario at once; returns totals shaped (scenarios, regions, FIELDS).
+
+    With region-level rates the projection is linear in the cell values, so cells are
+    summed per region once and the scenarios are evaluated on (scenarios × regions)
+    arrays. Per-cell rates (urban pull) are evaluated as (scenarios × cells) blocks,
+    each reduced to regions with one matrix product per growth factor.
+    """
+    values = base["values"]
+    codes = base["region_codes"]
+    n_scenarios = len(scenarios["growth"])
+    n_regions = len(base["regions"])
+    growth = scenarios["growth"][:, None]
+    ageing = scenarios["ageing"][:, None]
+    totals = np.zeros((n_scenarios, n_regions, len(FIELDS)))
+
+    if not np.any(scenarios["urban_pull"]):
+        region_sums = np.stack([np.bincount(codes, weights=values[:, i], minlength=n_regions) for i in range(len(FIELDS))], axis=1)
+        factors = _factors(growth, ageing, scenarios["migration"], years)
+        for name, fields in FACTOR_FIELDS.items():
+            totals[:, :, fields] = factors[name][:, :, None] * region_sums[None, :, fields]
+        return totals
+
+    chunk = max(1, chunk_elements // max(n_scenarios, 1))
+    for start in range(0, len(values), chunk):
+        cells = slice(start, start + chunk)
+        chunk_codes = codes[cells]
+        migration = scenarios["migration"][:, chunk_codes] + scenarios["urban_pull"][:, None] * base["density_z"][None, cells]
+        factors = _factors(growth, ageing, migration, years)
+        one_hot = np.zeros((len(chunk_codes), n_regions))
+        one_hot[np.arange(len(chunk_codes)), chunk_codes] = 1
+        for name, fields in FACTOR_FIELDS.items():
+            weights = (values[cells][:, None, fields] * one_hot[:, :, None]).reshape(len(chunk_codes), -1)
+            totals[:, :, fields] += (factors[name] @ weights).reshape(n_scenarios, n_regions, len(fields))
+    return totals
+
+
+def _columns(fields):
+    """pop_* columns from FIELDS-ordered sums (last axis)."""
+    f = {name: fields[..., i] for i, name in enumerate(FIELDS)}
+    overall = f["children"] + f["youth"] + f["other"] + f["elderly"]
+    men = f["children_male"] + f["youth_male"] + f["other_male"] + f["elderly_male"]
+    return {
+        "pop_overall": overall,
+        "pop_men": men,
+        "pop_women": overall - men,
+        "pop_0_5": f["children"],
+        "pop_15_24": f["youth"],
+        "pop_60_plus": f["elderly"],
+        "pop_women_15_49": f["women_15_49"],
+    }
+
+
+def projected_metrics(fields):
+    """pop_* totals and dependency ratio, one row per leading index of FIELDS-ordered sums."""
+    metrics = pd.DataFrame(_columns(np.atleast_2d(fields)))
+    dependents = metrics["pop_0_5"] + metrics["pop_60_plus"]
+    metrics["dependency_ratio"] = dependents / (metrics["pop_overall"] - dependents) * 100
+    return metrics
+
+
+def scenario_metrics(totals, scenarios):
+    """National projected metrics with each scenario's national rates, one row per scenario."""
+    metrics = projected_metrics(totals.sum(axis=1))
+    metrics.insert(0, "growth", scenarios["growth"])
+    metrics.insert(1, "ageing", scenarios["ageing"])
+    metrics.insert(2, "urban_pull", scenarios["urban_pull"])
+    return metrics
+
+
+def pyramid(fields):
+    """Male (negative) and female totals per age group from FIELDS-ordered sums."""
+    f = dict(zip(FIELDS, np.asarray(fields, dtype=float)))
+    totals = [f["children"], f["youth"], f["other"], f["elderly"]]
+    male = [f["children_male"], f["youth_male"], f["other_male"], f["elderly_male"]]
+    return pd.DataFrame({
+        "Age Group": AGE_GROUPS,
+        "Male": [-m for m in male],
+        "Female": [t - m for t, m in zip(totals, male)],
+    })
+
+
+def project_cells(base, scenarios, index, years):
+    """Per-cell projected pop_* columns for one scenario (for maps)."""
+    codes = base["region_codes"]
+    migration = scenarios["migration"][index][codes] + scenarios["urban_pull"][index] * base["density_z"]
+    factors = _factors(scenarios["growth"][index], scenarios["ageing"][index], migration, years)
+    projected = np.empty_like(base["values"])
+    for name, fields in FACTOR_FIELDS.items():
+        projected[:, fields] = base["values"][:, fields] * factors[name][:, None]
+    cells = pd.DataFrame(_columns(projected))
+    cells.insert(0, "longitude", base["longitude"])
+    cells.insert(1, "latitude", base["latitude"])
+    return cells